@@ -15,8 +15,18 @@ if not (API_KEY_ID and ISSUER_ID and P8 and BUNDLE_ID):
     print("::warning title=ASC check::Missing API credentials or bundle id; skipping")
     sys.exit(0)
 
+_tok = None
+_tok_exp = 0.0
+
 def token():
-    return jwt.encode({'iss': ISSUER_ID, 'exp': int(time.time()) + 900, 'aud': 'appstoreconnect-v1'}, P8, algorithm='ES256', headers={'kid': API_KEY_ID})
+    # ES256 signing is not free; reuse the token until shortly before it expires
+    global _tok, _tok_exp
+    now = time.time()
+    if _tok and now < _tok_exp - 30:
+        return _tok
+    _tok_exp = now + 900
+    _tok = jwt.encode({'iss': ISSUER_ID, 'exp': int(_tok_exp), 'aud': 'appstoreconnect-v1'}, P8, algorithm='ES256', headers={'kid': API_KEY_ID})
+    return _tok
 
 def get(url):
     req = urllib.request.Request(url, headers={'Authorization': f'Bearer {token()}', 'Accept':'application/json'})
@@ -37,23 +47,19 @@ if not app_id:
     print(f"::warning title=ASC check::App not found for bundle {BUNDLE_ID}")
     sys.exit(0)
 
-def attr(b, k):
-    return b.get('attributes', {}).get(k)
-
 deadline = time.time() + 300  # poll up to 5 minutes
 last_summary = None
 while True:
     builds = list_builds(app_id)
     if builds:
-        summary = []
-        for b in builds:
-            v = attr(b,'version'); bn = attr(b,'buildVersion'); st = attr(b,'processingState'); up = attr(b,'uploadedDate')
-            summary.append(f"{v} ({bn}) state={st} uploaded={up}")
-        joined = " | ".join(summary)
+        attrs = [b.get('attributes') or {} for b in builds]
+        joined = " | ".join(
+            f"{a.get('version')} ({a.get('buildVersion')}) state={a.get('processingState')} uploaded={a.get('uploadedDate')}"
+            for a in attrs)
         if joined != last_summary:
             print("::notice title=ASC builds::" + joined)
             last_summary = joined
-        states = {attr(b,'processingState') for b in builds}
+        states = {a.get('processingState') for a in attrs}
         if 'VALID' in states:
             print("::notice title=ASC check::Build is VALID and should appear in TestFlight shortly")
             break
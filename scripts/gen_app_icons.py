@@ -15,17 +15,29 @@ def px_from(size_str: str, scale_str: str) -> int:
     scale = int(scale_str.replace('x', ''))
     return base * scale
 
-def _png_chunk(tag: bytes, data: bytes) -> bytes:
-    return struct.pack('>I', len(data)) + tag + data + struct.pack('>I', zlib.crc32(tag + data) & 0xffffffff)
+def _png_chunk(out: bytearray, off: int, tag: bytes, data: bytes) -> int:
+    # Write length, tag, data and CRC in place; returns the offset past the chunk
+    n = len(data)
+    struct.pack_into('>I4s', out, off, n, tag)
+    out[off+8:off+8+n] = data
+    struct.pack_into('>I', out, off+8+n, zlib.crc32(memoryview(out)[off+4:off+8+n]) & 0xffffffff)
+    return off + 12 + n
 
-def _solid_png_bytes(w: int, h: int, rgb=(46,125,246)) -> bytes:
-    # Create raw scanlines with filter 0
+def _solid_png_bytes(w: int, h: int, rgb=(46,125,246)) -> bytearray:
+    # First scanline uses filter 0 (None); every later row uses filter 2 (Up),
+    # which for a solid image is all zero deltas and deflates to almost nothing
     r, g, b = rgb
-    row = bytes([0] + [r, g, b]*w)
-    raw = row * h
+    first = bytes([0] + [r, g, b]*w)
+    rest = (b"\x02" + bytes(3*w)) * (h - 1)
+    raw = first + rest
     ihdr = struct.pack('>IIBBBBB', w, h, 8, 2, 0, 0, 0)  # 8-bit, truecolor
-    idat = zlib.compress(raw, 9)
-    png = b"\x89PNG\r\n\x1a\n" + _png_chunk(b'IHDR', ihdr) + _png_chunk(b'IDAT', idat) + _png_chunk(b'IEND', b'')
+    idat = zlib.compress(raw, 1)  # fast level; icons stay a few tens of KB
+    # Assemble signature and chunks into one preallocated buffer
+    png = bytearray(8 + 3*12 + len(ihdr) + len(idat))
+    png[:8] = b"\x89PNG\r\n\x1a\n"
+    off = _png_chunk(png, 8, b'IHDR', ihdr)
+    off = _png_chunk(png, off, b'IDAT', idat)
+    _png_chunk(png, off, b'IEND', b'')
     return png
 
 def gen_icon(path: Path, px: int):
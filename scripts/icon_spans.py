@@ -0,0 +1,132 @@
+"""
+Scanline span helpers shared by the stdlib icon renderers in this folder.
+
+The renderers draw convex shapes, so each row meets a shape in one run of
+pixels that is filled by slice assignment. With float geometry a bound
+computed from the shape can be off by a pixel, so the run is settled
+against the script's own per-pixel test to keep its output unchanged.
+"""
+import math
+
+
+def settle_span(lo, hi, w, inside):
+    """Clip the inclusive span [lo, hi] to 0..w-1 and nudge its ends until
+    they agree with the exact per-pixel test; None when empty."""
+    lo, hi = max(0, lo), min(w - 1, hi)
+    while lo <= hi and not inside(lo):
+        lo += 1
+    while lo > 0 and inside(lo - 1):
+        lo -= 1
+    while hi >= lo and not inside(hi):
+        hi -= 1
+    while hi < w - 1 and inside(hi + 1):
+        hi += 1
+    return (lo, hi) if lo <= hi else None
+
+
+def edge_functions(ax, ay, bx, by, cx, cy):
+    """Coefficients (a, b, c) of E(x, y) = a*x + b*y + c for each triangle
+    edge, oriented so the interior is where all three are non-negative.
+    Integer vertices give integer coefficients."""
+    sign = 1 if (bx - ax) * (cy - ay) - (by - ay) * (cx - ax) >= 0 else -1
+    return [
+        (sign * (y0 - y1), sign * (x1 - x0), sign * (x0 * y1 - x1 * y0))
+        for (x0, y0), (x1, y1) in (((ax, ay), (bx, by)), ((bx, by), (cx, cy)), ((cx, cy), (ax, ay)))
+    ]
+
+
+def tri_span(edges, y, w, inside=None):
+    """Inclusive x span of row y where every edge function is non-negative,
+    within 0..w-1, or None.
+
+    Each edge bounds x from one side. With integer coefficients the floor
+    divisions are exact; for float geometry pass the caller's per-pixel
+    test as inside and the bounds are settled against it.
+    """
+    lo, hi = 0, w - 1
+    for a, b, c in edges:
+        k = b * y + c
+        if a > 0:
+            lo = max(lo, int(-(k // a)))
+        elif a < 0:
+            hi = min(hi, int(k // -a))
+        elif k < 0:
+            return None
+    if inside is not None:
+        return settle_span(lo, hi, w, inside)
+    return (lo, hi) if lo <= hi else None
+
+
+def fill_span(row, x0, x1, rgb):
+    """Paint columns x0..x1 (inclusive, clipped to the row) of a packed row
+    of len(rgb)-byte pixels with rgb."""
+    x0, x1 = max(0, x0), min(len(row) // len(rgb) - 1, x1)
+    if x0 <= x1:
+        n = len(rgb)
+        row[n * x0:n * x1 + n] = rgb * (x1 - x0 + 1)
+
+
+def in_round_rect(x, y, rx, ry, rw, rh, r):
+    """Whether (x, y) lies in the rectangle with corners rounded to radius r."""
+    # Clamp to inner rect and check distance to corner circle
+    nx = min(max(x, rx + r), rx + rw - r)
+    ny = min(max(y, ry + r), ry + rh - r)
+    dx, dy = x - nx, y - ny
+    return (dx * dx + dy * dy) <= r * r
+
+
+def round_rect_span(y, rx, ry, rw, rh, r, w):
+    """Inclusive x span of row y inside the rounded rectangle, or None."""
+    ny = min(max(y, ry + r), ry + rh - r)
+    dy = y - ny
+    if dy * dy > r * r:
+        return None
+    half = math.sqrt(r * r - dy * dy)
+    return settle_span(math.ceil(rx + r - half), math.floor(rx + rw - r + half), w,
+                       lambda x: in_round_rect(x, y, rx, ry, rw, rh, r))
+
+
+def dist2_to_seg(x, y, x1, y1, x2, y2):
+    """Squared distance from (x, y) to the segment; callers compare it
+    with a squared threshold instead of taking a root."""
+    vx, vy = x2 - x1, y2 - y1
+    wx, wy = x - x1, y - y1
+    c1 = vx * wx + vy * wy
+    if c1 <= 0:
+        return (x - x1) * (x - x1) + (y - y1) * (y - y1)
+    c2 = vx * vx + vy * vy
+    if c2 <= c1:
+        return (x - x2) * (x - x2) + (y - y2) * (y - y2)
+    b = c1 / c2
+    bx, by = x1 + b * vx, y1 + b * vy
+    return (x - bx) * (x - bx) + (y - by) * (y - by)
+
+
+def stroke_span(y, x1, y1, x2, y2, thick, w):
+    """Inclusive x span of row y closer than thick to the segment, within
+    0..w-1, or None.
+
+    The thick segment is convex, so the row meets it in one run around the
+    row's point nearest the segment; both ends are bisected with the exact
+    distance test.
+    """
+    thick2 = thick * thick
+
+    def inside(x):
+        return dist2_to_seg(x, y, x1, y1, x2, y2) < thick2
+
+    s = min(1.0, max(0.0, (y - y1) / (y2 - y1))) if y2 != y1 else 0.5
+    near = x1 + s * (x2 - x1)
+    k = next((k for k in (math.floor(near), math.ceil(near)) if 0 <= k < w and inside(k)), None)
+    if k is None:
+        return None
+    out, inn = -1, k  # inside(out) is False (or off-canvas), inside(inn) is True
+    while inn - out > 1:
+        mid = (out + inn) // 2
+        out, inn = (out, mid) if inside(mid) else (mid, inn)
+    lo = inn
+    inn, out = k, w
+    while out - inn > 1:
+        mid = (inn + out) // 2
+        inn, out = (mid, out) if inside(mid) else (inn, mid)
+    return (lo, inn)
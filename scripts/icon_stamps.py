@@ -0,0 +1,53 @@
+"""
+Skip-if-unchanged bookkeeping for the AppIcon generators in this folder.
+
+For each icon it writes, a generator records the source it was rendered
+with, the pixel size and the CRC of the PNG bytes. Other scripts write the
+same filenames without touching the record, so an icon only counts as up
+to date while the file on disk still has the recorded CRC.
+"""
+import json
+import sys
+import zlib
+from pathlib import Path
+
+# Hidden, so actool ignores it; listed in .gitignore
+STAMPS_NAME = ".generated.json"
+
+
+def source_tag(script: str) -> str:
+    """Name of script plus one CRC over it and every module it has imported
+    from this folder, so a change to shared helpers re-renders as well."""
+    here = Path(script).resolve()
+    files = {here}
+    for module in list(sys.modules.values()):
+        path = getattr(module, "__file__", None)
+        if path and Path(path).resolve().parent == here.parent:
+            files.add(Path(path).resolve())
+    crc = 0
+    for path in sorted(files):
+        crc = zlib.crc32(path.read_bytes(), crc)
+    return f"{here.name}:{crc:08x}"
+
+
+class IconStamps:
+    """The stamps file of one appiconset, as seen by one generator script."""
+
+    def __init__(self, icon_dir: Path, script: str):
+        self.path = icon_dir / STAMPS_NAME
+        self.stamps = json.loads(self.path.read_text()) if self.path.exists() else {}
+        self.tag = source_tag(script)
+
+    def _stamp(self, px: int, png: bytes) -> str:
+        return f"{self.tag}:{px}:{zlib.crc32(png):08x}"
+
+    def stale(self, tasks):
+        """The (out, px) tasks whose file is missing or not as last written."""
+        return [(out, px) for out, px in tasks
+                if not (out.exists() and self.stamps.get(out.name) == self._stamp(px, out.read_bytes()))]
+
+    def record(self, out: Path, px: int, png: bytes) -> None:
+        self.stamps[out.name] = self._stamp(px, png)
+
+    def save(self) -> None:
+        self.path.write_text(json.dumps(self.stamps, indent=2, sort_keys=True))
@@ -9,6 +9,8 @@ Output: branding/app_icon_1024.png
 from pathlib import Path
 import struct, zlib, math
 
+from icon_spans import edge_functions, fill_span, tri_span
+
 W = H = 1024
 OUT = Path("branding/app_icon_1024.png")
 
@@ -22,27 +24,13 @@ def bg_color(y):
     t = y / (H - 1)
     return (lerp(top[0], bot[0], t), lerp(top[1], bot[1], t), lerp(top[2], bot[2], t))
 
-def inside_triangle(px, py, ax, ay, bx, by, cx, cy):
-    # Barycentric technique
-    v0x, v0y = cx - ax, cy - ay
-    v1x, v1y = bx - ax, by - ay
-    v2x, v2y = px - ax, py - ay
-    dot00 = v0x*v0x + v0y*v0y
-    dot01 = v0x*v1x + v0y*v1y
-    dot02 = v0x*v2x + v0y*v2y
-    dot11 = v1x*v1x + v1y*v1y
-    dot12 = v1x*v2x + v1y*v2y
-    denom = (dot00 * dot11 - dot01 * dot01)
-    if denom == 0:
-        return False
-    inv = 1.0 / denom
-    u = (dot11 * dot02 - dot01 * dot12) * inv
-    v = (dot00 * dot12 - dot01 * dot02) * inv
-    return (u >= 0) and (v >= 0) and (u + v <= 1)
-
 def draw_icon():
-    # Build raw RGB buffer with PNG scanline filter bytes
-    rows = []
+    # Build raw RGB buffer with PNG scanline filter bytes (left at 0). Every
+    # shape is convex, so a row is the gradient plus a few solid spans; filling
+    # those with slice assignment keeps the per-pixel work out of the interpreter.
+    stride = 1 + 3*W
+    buf = bytearray(H * stride)
+    view = memoryview(buf)
     cx, cy_top = W//2, 430
     r = 260
     # Triangle base near middle, apex toward bottom
@@ -52,40 +40,50 @@ def draw_icon():
 
     # Precompute for speed
     r2 = r*r
+    cap_dy = int(r*0.35)
+    edges = edge_functions(ax, ay, bx, by, tx, ty)
     highlight_cx, highlight_cy, highlight_r2 = cx - 130, cy_top - 150, 90*90
+    white = b"\xff\xff\xff"
+    bg_rows = [bytes(bg_color(y)) for y in range(H)]
 
     for y in range(H):
-        row = bytearray([0])  # filter byte
-        br, bg, bb = bg_color(y)
-        for x in range(W):
-            # Background gradient
-            r0, g0, b0 = br, bg, bb
+        # Background gradient
+        bg = bg_rows[y]
+        row = view[y*stride + 1:(y + 1)*stride]
+        row[:] = bg * W
+
+        # subtle radial highlight on background (the drop is drawn over it)
+        hy = y - highlight_cy
+        if hy*hy <= highlight_r2:
+            h = math.isqrt(highlight_r2 - hy*hy)
+            tint = bytes(min(255, int(c*1.10 + 20)) for c in bg)
+            fill_span(row, highlight_cx - h, highlight_cx + h, tint)
 
-            # Water drop mask: circle cap + triangle tail
-            dx = x - cx
-            dy = y - cy_top
-            in_cap = (dy <= int(r*0.35)) and (dx*dx + dy*dy <= r2)
-            in_tail = inside_triangle(x, y, ax, ay, bx, by, tx, ty)
-            if in_cap or in_tail:
-                r0, g0, b0 = 255, 255, 255
-            else:
-                # subtle radial highlight on background
-                hx = x - highlight_cx
-                hy = y - highlight_cy
-                if hx*hx + hy*hy <= highlight_r2:
-                    r0 = min(255, int(r0*1.10 + 20))
-                    g0 = min(255, int(g0*1.10 + 20))
-                    b0 = min(255, int(b0*1.10 + 20))
-            row += bytes((r0, g0, b0))
-        rows.append(bytes(row))
-    return b"".join(rows)
+        # Water drop mask: circle cap + triangle tail
+        dy = y - cy_top
+        if dy <= cap_dy and dy*dy <= r2:
+            h = math.isqrt(r2 - dy*dy)
+            fill_span(row, cx - h, cx + h, white)
+        tail = tri_span(edges, y, W)
+        if tail:
+            fill_span(row, tail[0], tail[1], white)
+    return buf
 
-def png_from_raw(raw: bytes) -> bytes:
-    def chunk(tag: bytes, data: bytes) -> bytes:
-        return struct.pack('>I', len(data)) + tag + data + struct.pack('>I', zlib.crc32(tag + data) & 0xffffffff)
+def png_from_raw(raw: bytes) -> bytearray:
     ihdr = struct.pack('>IIBBBBB', W, H, 8, 2, 0, 0, 0)  # 8-bit, RGB
-    idat = zlib.compress(raw, 9)
-    return b"\x89PNG\r\n\x1a\n" + chunk(b'IHDR', ihdr) + chunk(b'IDAT', idat) + chunk(b'IEND', b'')
+    idat = zlib.compress(raw, 1)  # fast level; icons stay a few tens of KB
+    out = bytearray(8 + 3*12 + len(ihdr) + len(idat))
+    out[:8] = b"\x89PNG\r\n\x1a\n"
+    def chunk(off: int, tag: bytes, data: bytes) -> int:
+        n = len(data)
+        struct.pack_into('>I4s', out, off, n, tag)
+        out[off+8:off+8+n] = data
+        struct.pack_into('>I', out, off+8+n, zlib.crc32(memoryview(out)[off+4:off+8+n]) & 0xffffffff)
+        return off + 12 + n
+    off = chunk(8, b'IHDR', ihdr)
+    off = chunk(off, b'IDAT', idat)
+    chunk(off, b'IEND', b'')
+    return out
 
 def main():
     OUT.parent.mkdir(parents=True, exist_ok=True)
@@ -9,7 +9,9 @@ Output: branding/app_icon_goal_1024.png
 Uses only the Python stdlib so it runs anywhere.
 """
 from pathlib import Path
-import struct, zlib
+import struct, zlib, math
+
+from icon_spans import edge_functions, fill_span, stroke_span, tri_span
 
 W = H = 1024
 OUT = Path("branding/app_icon_goal_1024.png")
@@ -24,54 +26,18 @@ def bg_color(y):
     t = y / (H - 1)
     return (lerp(top[0], bot[0], t), lerp(top[1], bot[1], t), lerp(top[2], bot[2], t))
 
-def inside_triangle(px, py, ax, ay, bx, by, cx, cy):
-    # Barycentric technique
-    v0x, v0y = cx - ax, cy - ay
-    v1x, v1y = bx - ax, by - ay
-    v2x, v2y = px - ax, py - ay
-    dot00 = v0x*v0x + v0y*v0y
-    dot01 = v0x*v1x + v0y*v1y
-    dot02 = v0x*v2x + v0y*v2y
-    dot11 = v1x*v1x + v1y*v1y
-    dot12 = v1x*v2x + v1y*v2y
-    denom = (dot00 * dot11 - dot01 * dot01)
-    if denom == 0:
-        return False
-    inv = 1.0 / denom
-    u = (dot11 * dot02 - dot01 * dot12) * inv
-    v = (dot00 * dot12 - dot01 * dot02) * inv
-    return (u >= 0) and (v >= 0) and (u + v <= 1)
-
-def inside_check(px, py):
-    """Simple tick mark polygon inside the drop area.
-    The checkmark sits within a ~520x380 box centered horizontally.
-    """
-    # Define two line segments (thick) forming a check.
-    # We approximate thickness using distance to a segment.
-    import math
-    def dist_to_seg(x, y, x1, y1, x2, y2):
-        vx, vy = x2 - x1, y2 - y1
-        wx, wy = x - x1, y - y1
-        c1 = vx*wx + vy*wy
-        if c1 <= 0:
-            return math.hypot(x - x1, y - y1)
-        c2 = vx*vx + vy*vy
-        if c2 <= c1:
-            return math.hypot(x - x2, y - y2)
-        b = c1 / c2
-        bx, by = x1 + b*vx, y1 + b*vy
-        return math.hypot(x - bx, y - by)
-
-    # Coordinates tuned for the 1024 canvas
-    thick = 18.0
-    a1 = (390, 590)
-    a2 = (470, 670)
-    b1 = (470, 670)
-    b2 = (650, 470)
-    return (dist_to_seg(px, py, *a1, *a2) < thick) or (dist_to_seg(px, py, *b1, *b2) < thick)
+# Checkmark geometry tuned for the 1024 canvas: two thick segments
+CHECK_THICK = 18.0
+CHECK_SEGS = (((390, 590), (470, 670)), ((470, 670), (650, 470)))
 
 def draw_icon():
-    rows = []
+    # Every shape is convex, so a row is the gradient plus a few solid spans
+    # filled by slice assignment (the check strokes too, via stroke_span);
+    # only the cap rim shading still needs per-pixel work. Rows go straight
+    # into one preallocated buffer whose filter bytes stay 0.
+    stride = 1 + 3*W
+    buf = bytearray(H * stride)
+    view = memoryview(buf)
     cx, cy_top = W//2, 430
     r = 260
     # Rounded triangle tail by blending circle + triangle as before
@@ -80,44 +46,70 @@ def draw_icon():
     tx, ty = cx, 820
 
     r2 = r*r
+    cap_dy = int(r*0.35)
+    edges = edge_functions(ax, ay, bx, by, tx, ty)
+    white = b"\xff\xff\xff"
+    green = bytes((52, 199, 89))  # System green #34C759
+    pad = int(CHECK_THICK) + 1
+    check_y0 = min(y for seg in CHECK_SEGS for _, y in seg) - pad
+    check_y1 = max(y for seg in CHECK_SEGS for _, y in seg) + pad
+    bg_rows = [bytes(bg_color(y)) for y in range(H)]
 
     for y in range(H):
-        row = bytearray([0])  # filter byte
-        br, bg, bb = bg_color(y)
-        for x in range(W):
-            r0, g0, b0 = br, bg, bb
-            # Water drop shape
-            dx = x - cx
-            dy = y - cy_top
-            in_cap = (dy <= int(r*0.35)) and (dx*dx + dy*dy <= r2)
-            in_tail = inside_triangle(x, y, ax, ay, bx, by, tx, ty)
-            in_drop = in_cap or in_tail
-            if in_drop:
+        row = view[y*stride + 1:(y + 1)*stride]
+        row[:] = bg_rows[y] * W
+        # Water drop shape
+        dy = y - cy_top
+        cap = None
+        if dy <= cap_dy and dy*dy <= r2:
+            h = math.isqrt(r2 - dy*dy)
+            cap = (cx - h, cx + h)
+        tail = tri_span(edges, y, W)
+        for span in (cap, tail):
+            if span:
                 # Fill white drop
-                r0, g0, b0 = 255, 255, 255
-                # Draw soft inner shadow near edges for depth
-                # compute distance to drop boundary roughly via circle edge
-                if in_cap:
-                    d = abs((dx*dx + dy*dy) - r2)
-                    if d < 2200:  # near edge
-                        shade = max(0, 40 - d//80)
-                        r0 = max(0, r0 - shade)
-                        g0 = max(0, g0 - shade)
-                        b0 = max(0, b0 - shade)
-                # Checkmark overlay inside drop
-                if inside_check(x, y):
-                    # System green #34C759
-                    r0, g0, b0 = 52, 199, 89
-            row += bytes((r0, g0, b0))
-        rows.append(bytes(row))
-    return b"".join(rows)
+                fill_span(row, span[0], span[1], white)
+        if cap:
+            # Draw soft inner shadow near edges for depth: only cap pixels
+            # within 2200 (squared distance) of the rim are shaded
+            k = r2 - 2200 - dy*dy
+            if k >= 0:
+                inner = math.isqrt(k)
+                rim = (range(cap[0], cx - inner), range(cx + inner + 1, cap[1] + 1))
+            else:
+                rim = (range(cap[0], cap[1] + 1),)
+            for xs in rim:
+                for x in xs:
+                    dx = x - cx
+                    d = r2 - (dx*dx + dy*dy)
+                    shade = max(0, 40 - d//80)
+                    row[3*x:3*x + 3] = bytes((255 - shade,)) * 3
+        # Checkmark overlay inside drop
+        if (cap or tail) and check_y0 <= y <= check_y1:
+            for p1, p2 in CHECK_SEGS:
+                stroke = stroke_span(y, *p1, *p2, CHECK_THICK, W)
+                if not stroke:
+                    continue
+                for span in (cap, tail):
+                    if span:
+                        fill_span(row, max(span[0], stroke[0]), min(span[1], stroke[1]), green)
+    return buf
 
-def png_from_raw(raw: bytes) -> bytes:
-    def chunk(tag: bytes, data: bytes) -> bytes:
-        return struct.pack('>I', len(data)) + tag + data + struct.pack('>I', zlib.crc32(tag + data) & 0xffffffff)
+def png_from_raw(raw: bytes) -> bytearray:
     ihdr = struct.pack('>IIBBBBB', W, H, 8, 2, 0, 0, 0)  # 8-bit, RGB
-    idat = zlib.compress(raw, 9)
-    return b"\x89PNG\r\n\x1a\n" + chunk(b'IHDR', ihdr) + chunk(b'IDAT', idat) + chunk(b'IEND', b'')
+    idat = zlib.compress(raw, 1)  # fast level; icons stay a few tens of KB
+    out = bytearray(8 + 3*12 + len(ihdr) + len(idat))
+    out[:8] = b"\x89PNG\r\n\x1a\n"
+    def chunk(off: int, tag: bytes, data: bytes) -> int:
+        n = len(data)
+        struct.pack_into('>I4s', out, off, n, tag)
+        out[off+8:off+8+n] = data
+        struct.pack_into('>I', out, off+8+n, zlib.crc32(memoryview(out)[off+4:off+8+n]) & 0xffffffff)
+        return off + 12 + n
+    off = chunk(8, b'IHDR', ihdr)
+    off = chunk(off, b'IDAT', idat)
+    chunk(off, b'IEND', b'')
+    return out
 
 def main():
     OUT.parent.mkdir(parents=True, exist_ok=True)
@@ -3,11 +3,14 @@ import sys, pathlib, zipfile, compileall
 
 def main():
     lib = pathlib.Path(sys.base_prefix) / "Lib"
-    compileall.compile_dir(str(lib), force=True, quiet=1, legacy=True)
+    compileall.compile_dir(str(lib), force=True, quiet=1, legacy=True, workers=0)  # 0 = os.cpu_count()
     out = pathlib.Path("python-stdlib.zip")
-    with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as zf:
+    with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED, compresslevel=1) as zf:
         for p in lib.rglob("*"):
-            zf.write(p, p.relative_to(lib))
+            # Keep the sources for tracebacks, inspect and pdb; the .pyc files
+            # (legacy=True writes them beside their source) are stored
+            # uncompressed so zipimport loads them without inflating
+            zf.write(p, p.relative_to(lib), zipfile.ZIP_STORED if p.suffix == ".pyc" else None)
         zf.writestr("PYTHON_VERSION.txt", sys.version.split()[0])
     print(f"Wrote {out} with PYTHON_VERSION.txt={sys.version.split()[0]}")
 
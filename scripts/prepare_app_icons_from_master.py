@@ -2,8 +2,14 @@
 import json
 import os
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+try:
+    from PIL import Image
+except ImportError:  # fall back to macOS sips
+    Image = None
+
 APPICON_DIR = Path("NotesApp/Assets.xcassets/AppIcon.appiconset")
 CONTENTS = APPICON_DIR / "Contents.json"
 
@@ -29,6 +35,7 @@ def main():
     data = json.loads(CONTENTS.read_text())
     images = data.get('images', [])
     changed = False
+    jobs = []
     for item in images:
         size = item.get('size')
         scale = item.get('scale')
@@ -44,12 +51,24 @@ def main():
             px = px_from(size, scale)
         out = APPICON_DIR / filename
         out.parent.mkdir(parents=True, exist_ok=True)
-        # Use macOS sips to resize the master icon to required size
-        run(["sips", "-s", "format", "png", "-z", str(px), str(px), str(master_path), "--out", str(out)])
+        jobs.append((px, out))
         if item.get('filename') != filename:
             item['filename'] = filename
             changed = True
 
+    if Image is not None:
+        # Decode the master once and resize every size from memory
+        with Image.open(master_path) as im:
+            im = im.convert("RGB")
+            for px, out in jobs:
+                im.resize((px, px), Image.LANCZOS).save(out, format="PNG", compress_level=1)
+    else:
+        # Use macOS sips to resize the master icon to required size; the work
+        # happens in the subprocesses, so threads are enough to overlap them
+        cmds = [["sips", "-s", "format", "png", "-z", str(px), str(px), str(master_path), "--out", str(out)] for px, out in jobs]
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as ex:
+            list(ex.map(run, cmds))
+
     if changed:
         CONTENTS.write_text(json.dumps(data, indent=2))
 
@@ -9,6 +9,9 @@ import json
 from pathlib import Path
 import struct, zlib, math
 
+from icon_stamps import IconStamps
+from icon_spans import edge_functions, settle_span, stroke_span, tri_span
+
 APPICON_DIR = Path("NotesApp/Assets.xcassets/AppIcon.appiconset")
 CONTENTS = APPICON_DIR / "Contents.json"
 
@@ -19,24 +22,30 @@ def px_from(size_str: str, scale_str: str) -> int:
     return base * scale
 
 
-def _png_chunk(tag: bytes, data: bytes) -> bytes:
-    return (
-        len(data).to_bytes(4, "big")
-        + tag
-        + data
-        + (zlib.crc32(tag + data) & 0xFFFFFFFF).to_bytes(4, "big")
-    )
+def _png_chunk(out: bytearray, off: int, tag: bytes, data: bytes) -> int:
+    """Write one PNG chunk into out at off and return the offset past it."""
+    n = len(data)
+    struct.pack_into(">I4s", out, off, n, tag)
+    out[off + 8:off + 8 + n] = data
+    crc = zlib.crc32(memoryview(out)[off + 4:off + 8 + n]) & 0xFFFFFFFF
+    struct.pack_into(">I", out, off + 8 + n, crc)
+    return off + 12 + n
 
 
-def _png_from_raw(w: int, h: int, raw: bytes) -> bytes:
+def _png_from_raw(w: int, h: int, raw: bytes) -> bytearray:
     ihdr = struct.pack(
         ">IIBBBBB", w, h, 8, 2, 0, 0, 0  # 8-bit, RGB, no alpha
     )
-    idat = zlib.compress(raw, 9)
-    return b"\x89PNG\r\n\x1a\n" + _png_chunk(b"IHDR", ihdr) + _png_chunk(b"IDAT", idat) + _png_chunk(b"IEND", b"")
+    idat = zlib.compress(raw, 1)  # fast level; icons stay a few tens of KB
+    out = bytearray(8 + 3 * 12 + len(ihdr) + len(idat))
+    out[:8] = b"\x89PNG\r\n\x1a\n"
+    off = 8
+    for tag, data in ((b"IHDR", ihdr), (b"IDAT", idat), (b"IEND", b"")):
+        off = _png_chunk(out, off, tag, data)
+    return out
 
 
-def _render_icon(px: int) -> bytes:
+def _render_icon(px: int) -> bytearray:
     W = H = px
 
     def lerp(a, b, t):
@@ -48,36 +57,6 @@ def _render_icon(px: int) -> bytes:
         t = y / (H - 1)
         return (lerp(top[0], bot[0], t), lerp(top[1], bot[1], t), lerp(top[2], bot[2], t))
 
-    def inside_triangle(px, py, ax, ay, bx, by, cx, cy):
-        v0x, v0y = cx - ax, cy - ay
-        v1x, v1y = bx - ax, by - ay
-        v2x, v2y = px - ax, py - ay
-        dot00 = v0x * v0x + v0y * v0y
-        dot01 = v0x * v1x + v0y * v1y
-        dot02 = v0x * v2x + v0y * v2y
-        dot11 = v1x * v1x + v1y * v1y
-        dot12 = v1x * v2x + v1y * v2y
-        denom = (dot00 * dot11 - dot01 * dot01)
-        if denom == 0:
-            return False
-        inv = 1.0 / denom
-        u = (dot11 * dot02 - dot01 * dot12) * inv
-        v = (dot00 * dot12 - dot01 * dot02) * inv
-        return (u >= 0) and (v >= 0) and (u + v <= 1)
-
-    def dist_to_seg(x, y, x1, y1, x2, y2):
-        vx, vy = x2 - x1, y2 - y1
-        wx, wy = x - x1, y - y1
-        c1 = vx * wx + vy * wy
-        if c1 <= 0:
-            return math.hypot(x - x1, y - y1)
-        c2 = vx * vx + vy * vy
-        if c2 <= c1:
-            return math.hypot(x - x2, y - y2)
-        b = c1 / c2
-        bx, by = x1 + b * vx, y1 + b * vy
-        return math.hypot(x - bx, y - by)
-
     cx = W / 2.0
     cy_top = 0.420 * H
     r = 0.254 * W
@@ -86,39 +65,76 @@ def _render_icon(px: int) -> bytes:
     tx, ty = cx, 0.801 * H
     r2 = r * r
 
+    # Cap pixels can only darken within rim_band (squared distance) of the
+    # edge: beyond that the shade formula is zero or the band test fails
+    rim_band = min(0.0215 * W * W, 40 * 0.000078 * W * W)
+    cap_dy = 0.35 * r
+    rim_d = 0.0215 * W * W
+    shade_step = 0.000078 * W * W
+    greys = [bytes((v, v, v)) for v in range(256)]
+    edges = edge_functions(ax, ay, bx, by, tx, ty)
+    tri_y0, tri_y1 = max(0, math.ceil(min(ay, by, ty))), min(H - 1, math.floor(max(ay, by, ty)))
+
     a1 = (0.381 * W, 0.576 * H)
     a2 = (0.459 * W, 0.654 * H)
     b1 = a2
     b2 = (0.635 * W, 0.459 * H)
     thick = 0.0176 * W
-
-    rows = []
-    for y in range(int(H)):
-        row = bytearray([0])
-        br, bg, bb = bg_color(y)
-        for x in range(int(W)):
-            r0, g0, b0 = br, bg, bb
-            dx = x - cx
-            dy = y - cy_top
-            in_cap = (dy <= 0.35 * r) and (dx * dx + dy * dy <= r2)
-            in_tail = inside_triangle(x, y, ax, ay, bx, by, tx, ty)
-            in_drop = in_cap or in_tail
-            if in_drop:
-                r0, g0, b0 = 255, 255, 255
-                if in_cap:
-                    d = abs((dx * dx + dy * dy) - r2)
-                    if d < (0.0215 * W * W):
-                        shade = max(0, int(40 - d / (0.000078 * W * W)))
-                        r0 = max(0, r0 - shade)
-                        g0 = max(0, g0 - shade)
-                        b0 = max(0, b0 - shade)
-                if (dist_to_seg(x, y, *a1, *a2) < thick) or (
-                    dist_to_seg(x, y, *b1, *b2) < thick
-                ):
-                    r0, g0, b0 = 52, 199, 89
-            row += bytes((int(r0), int(g0), int(b0)))
-        rows.append(bytes(row))
-    return _png_from_raw(W, H, b"".join(rows))
+    check_y0 = math.floor(min(a1[1], a2[1], b2[1]) - thick)
+    check_y1 = math.ceil(max(a1[1], a2[1], b2[1]) + thick)
+
+    # The drop is convex, so each row is the gradient plus at most two white
+    # spans filled by slice assignment, as are the checkmark strokes; only
+    # the cap rim still needs per-pixel work. Filter bytes stay 0.
+    stride = 1 + 3 * W
+    buf = bytearray(H * stride)
+    view = memoryview(buf)
+    white = b"\xff\xff\xff"
+    green = bytes((52, 199, 89))
+    bg_rows = [bytes(bg_color(y)) for y in range(H)]
+    for y in range(H):
+        row = view[y * stride + 1:(y + 1) * stride]
+        row[:] = bg_rows[y] * W
+        dy = y - cy_top
+        dy2 = dy * dy
+        cap = None
+        if dy <= cap_dy and dy2 <= r2:
+            h = math.sqrt(r2 - dy2)
+            cap = settle_span(math.ceil(cx - h), math.floor(cx + h), W,
+                              lambda x: (x - cx) * (x - cx) + dy2 <= r2)
+        tail = None
+        if tri_y0 <= y <= tri_y1:
+            tail = tri_span(edges, y, W, lambda x: all(a * x + b * y + c >= 0 for a, b, c in edges))
+        for span in (cap, tail):
+            if span:
+                row[3 * span[0]:3 * span[1] + 3] = white * (span[1] - span[0] + 1)
+        if cap:
+            # Soft inner shadow; pixels well inside the rim stay white
+            k = r2 - rim_band - dy2 - 1
+            if k > 0:
+                inner = math.sqrt(k)
+                rim = (range(cap[0], min(cap[1] + 1, math.floor(cx - inner) + 2)),
+                       range(max(cap[0], math.ceil(cx + inner) - 1), cap[1] + 1))
+            else:
+                rim = (range(cap[0], cap[1] + 1),)
+            for xs in rim:
+                for x in xs:
+                    dx = x - cx
+                    d = abs((dx * dx + dy2) - r2)
+                    if d < rim_d:
+                        v = max(0, 255 - max(0, int(40 - d / shade_step)))
+                        row[3 * x:3 * x + 3] = greys[v]
+        if check_y0 <= y <= check_y1:
+            for p1, p2 in ((a1, a2), (b1, b2)):
+                stroke = stroke_span(y, *p1, *p2, thick, W)
+                if not stroke:
+                    continue
+                for span in (cap, tail):
+                    if span:
+                        lo, hi = max(span[0], stroke[0]), min(span[1], stroke[1])
+                        if lo <= hi:
+                            row[3 * lo:3 * hi + 3] = green * (hi - lo + 1)
+    return buf
 
 
 def main():
@@ -127,6 +143,7 @@ def main():
     data = json.loads(CONTENTS.read_text())
     images = data.get("images", [])
     changed = False
+    tasks = []
     for item in images:
         size = item.get("size")
         scale = item.get("scale")
@@ -142,11 +159,24 @@ def main():
             px = px_from(size, scale)
         out = APPICON_DIR / filename
         out.parent.mkdir(parents=True, exist_ok=True)
-        png = _render_icon(px)
-        out.write_bytes(png)
+        tasks.append((out, px))
         if item.get("filename") != filename:
             item["filename"] = filename
             changed = True
+    stamps = IconStamps(APPICON_DIR, __file__)
+    tasks = stamps.stale(tasks)
+    if not tasks:
+        if changed:
+            CONTENTS.write_text(json.dumps(data, indent=2))
+        print(f"Icons in {APPICON_DIR} are up to date")
+        return
+    # Several slots resolve to the same pixel size (20pt@2x and 40pt@1x are
+    # both 40px); render and encode each distinct size once
+    pngs = {px: _png_from_raw(px, px, _render_icon(px)) for px in {px for _, px in tasks}}
+    for out, px in tasks:
+        out.write_bytes(pngs[px])
+        stamps.record(out, px, pngs[px])
+    stamps.save()
     if changed:
         CONTENTS.write_text(json.dumps(data, indent=2))
     print(f"Wrote/updated icons into {APPICON_DIR}")
@@ -9,6 +9,9 @@ import json
 from pathlib import Path
 import struct, zlib, math
 
+from icon_stamps import IconStamps
+from icon_spans import edge_functions, round_rect_span, settle_span, tri_span
+
 APPICON_DIR = Path("NotesApp/Assets.xcassets/AppIcon.appiconset")
 CONTENTS = APPICON_DIR / "Contents.json"
 
@@ -19,21 +22,27 @@ def px_from(size_str: str, scale_str: str) -> int:
     return base * scale
 
 
-def _png_chunk(tag: bytes, data: bytes) -> bytes:
-    return (
-        len(data).to_bytes(4, "big")
-        + tag
-        + data
-        + (zlib.crc32(tag + data) & 0xFFFFFFFF).to_bytes(4, "big")
-    )
+def _png_chunk(out: bytearray, off: int, tag: bytes, data: bytes) -> int:
+    """Write one PNG chunk into out at off and return the offset past it."""
+    n = len(data)
+    struct.pack_into(">I4s", out, off, n, tag)
+    out[off + 8:off + 8 + n] = data
+    crc = zlib.crc32(memoryview(out)[off + 4:off + 8 + n]) & 0xFFFFFFFF
+    struct.pack_into(">I", out, off + 8 + n, crc)
+    return off + 12 + n
 
 
-def _png_from_raw(w: int, h: int, raw: bytes) -> bytes:
+def _png_from_raw(w: int, h: int, raw: bytes) -> bytearray:
     ihdr = struct.pack(
         ">IIBBBBB", w, h, 8, 2, 0, 0, 0  # 8-bit, RGB
     )
-    idat = zlib.compress(raw, 9)
-    return b"\x89PNG\r\n\x1a\n" + _png_chunk(b"IHDR", ihdr) + _png_chunk(b"IDAT", idat) + _png_chunk(b"IEND", b"")
+    idat = zlib.compress(raw, 1)  # fast level; icons stay a few tens of KB
+    out = bytearray(8 + 3 * 12 + len(ihdr) + len(idat))
+    out[:8] = b"\x89PNG\r\n\x1a\n"
+    off = 8
+    for tag, data in ((b"IHDR", ihdr), (b"IDAT", idat), (b"IEND", b"")):
+        off = _png_chunk(out, off, tag, data)
+    return out
 
 
 def _bg_color(y, H):
@@ -47,16 +56,8 @@ def _bg_color(y, H):
     )
 
 
-def _in_round_rect(x, y, rx, ry, rw, rh, r):
-    nx = min(max(x, rx + r), rx + rw - r)
-    ny = min(max(y, ry + r), ry + rh - r)
-    dx, dy = x - nx, y - ny
-    return (dx * dx + dy * dy) <= r * r
-
-
-def _render_bubble(px: int) -> bytes:
+def _render_bubble(px: int) -> bytearray:
     W = H = float(px)
-    raw_rows = []
 
     # Bubble metrics relative to size
     bx = 0.167 * W
@@ -68,57 +69,85 @@ def _render_bubble(px: int) -> bytes:
     tx1, ty1 = bx + 0.278 * bw, by + bh
     tx2, ty2 = bx + 0.389 * bw, by + bh
     tx3, ty3 = bx + 0.333 * bw, by + bh + 0.111 * H
-
-    def inside_triangle(px, py, ax, ay, bx, by, cx, cy):
-        v0x, v0y = cx - ax, cy - ay
-        v1x, v1y = bx - ax, by - ay
-        v2x, v2y = px - ax, py - ay
-        dot00 = v0x * v0x + v0y * v0y
-        dot01 = v0x * v1x + v0y * v1y
-        dot02 = v0x * v2x + v0y * v2y
-        dot11 = v1x * v1x + v1y * v1y
-        dot12 = v1x * v2x + v1y * v2y
-        denom = (dot00 * dot11 - dot01 * dot01)
-        if denom == 0:
-            return False
-        inv = 1.0 / denom
-        u = (dot11 * dot02 - dot01 * dot12) * inv
-        v = (dot00 * dot12 - dot01 * dot02) * inv
-        return (u >= 0) and (v >= 0) and (u + v <= 1)
+    edges = edge_functions(tx1, ty1, tx2, ty2, tx3, ty3)
+    tri_y0, tri_y1 = max(0, math.ceil(min(ty1, ty2, ty3))), min(px - 1, math.floor(max(ty1, ty2, ty3)))
 
     # Question mark parameters
     cx = 0.50 * W
     cy = 0.389 * H
     cr = 0.133 * W
     thick = max(2.0, 0.028 * W)
+    # The hook is the ring |dist - cr| <= thick limited to angles 210..360
+    # and 0..60 degrees (y down). Compare squared radii, and exclude the
+    # 60..210 gap with the two half-planes bounding it, instead of calling
+    # sqrt and atan2 per pixel.
+    ring_in2 = max(0.0, cr - thick) ** 2
+    ring_out2 = (cr + thick) ** 2
+    c60, s60 = math.cos(math.radians(60.0)), math.sin(math.radians(60.0))
+    c210, s210 = math.cos(math.radians(210.0)), math.sin(math.radians(210.0))
+    stem_x0, stem_x1 = math.ceil(cx + 0.011 * W), math.floor(cx + 0.044 * W)
+    stem_y0, stem_y1 = cy + 0.044 * H, cy + 0.144 * H
+    dot_x, dot_y, dot_r2 = cx + 0.027 * W, cy + 0.178 * H, (thick + 1.0) ** 2
+
+    # Bubble, tail and every stroke of the "?" are convex or a ring, so each
+    # row is the gradient plus a few runs filled by slice assignment; only
+    # the ring's angular gap is tested per pixel. One preallocated buffer
+    # holds all scanlines; filter bytes stay 0.
+    stride = 1 + 3 * px
+    buf = bytearray(px * stride)
+    view = memoryview(buf)
+    white = b"\xff\xff\xff"
+    blue = bytes((37, 99, 235))  # brand blue for clarity
+    bg_rows = [bytes(_bg_color(yi, px)) for yi in range(px)]
+    for yi in range(px):
+        row = view[yi * stride + 1:(yi + 1) * stride]
+        row[:] = bg_rows[yi] * px
+        body = [span for span in (
+            round_rect_span(yi, bx, by, bw, bh, brad, px),
+            tri_span(edges, yi, px, lambda x: all(a * x + b * yi + c >= 0 for a, b, c in edges))
+            if tri_y0 <= yi <= tri_y1 else None,
+        ) if span]
+        for lo, hi in body:
+            row[3 * lo:3 * hi + 3] = white * (hi - lo + 1)
+        if not body:
+            continue
 
-    for yi in range(int(H)):
-        row = bytearray([0])
-        br, bg, bb = _bg_color(yi, int(H))
-        for xi in range(int(W)):
-            r0, g0, b0 = br, bg, bb
-            in_rect = _in_round_rect(xi, yi, bx, by, bw, bh, brad)
-            in_tail = inside_triangle(xi, yi, tx1, ty1, tx2, ty2, tx3, ty3)
-            if in_rect or in_tail:
-                r0, g0, b0 = 255, 255, 255
-                # draw ? in brand blue for clarity
-                dx = xi - cx
-                dy = yi - cy
-                dist = (dx * dx + dy * dy) ** 0.5
-                ang = (math.degrees(math.atan2(dy, dx)) + 360.0) % 360.0
-                if abs(dist - cr) <= thick and (210.0 <= ang <= 360.0 or 0.0 <= ang <= 60.0):
-                    r0, g0, b0 = 37, 99, 235
-                if (cx + 0.044 * W >= xi >= cx + 0.011 * W) and (
-                    cy + 0.044 * H <= yi <= cy + 0.144 * H
-                ):
-                    r0, g0, b0 = 37, 99, 235
-                if (xi - (cx + 0.027 * W)) ** 2 + (yi - (cy + 0.178 * H)) ** 2 <= (
-                    (thick + 1.0) ** 2
-                ):
-                    r0, g0, b0 = 37, 99, 235
-            row += bytes((int(r0), int(g0), int(b0)))
-        raw_rows.append(bytes(row))
-    return b"".join(raw_rows)
+        # The "?" on this row: ring runs (minus the gap), stem and dot
+        dy = yi - cy
+        dy2 = dy * dy
+        rings = []
+        if dy2 <= ring_out2:
+            ho = math.sqrt(ring_out2 - dy2)
+            hi_ = math.sqrt(ring_in2 - dy2) if dy2 < ring_in2 else 0.0
+            def in_ring(x):
+                dx = x - cx
+                return ring_in2 <= dx * dx + dy2 <= ring_out2
+            for lo, hi in ((math.ceil(cx - ho), math.floor(cx - hi_)), (math.ceil(cx + hi_), math.floor(cx + ho))):
+                span = settle_span(lo, hi, px, in_ring)
+                if span:
+                    rings.append(span)
+        for lo, hi in rings:
+            for x in range(lo, hi + 1):
+                dx = x - cx
+                in_gap = (c60 * dy - s60 * dx > 0) and (s210 * dx - c210 * dy > 0)
+                if not in_gap and any(b0 <= x <= b1 for b0, b1 in body):
+                    row[3 * x:3 * x + 3] = blue
+        marks = []
+        if stem_y0 <= yi <= stem_y1:
+            marks.append((stem_x0, stem_x1))
+        ddy = yi - dot_y
+        if ddy * ddy <= dot_r2:
+            h = math.sqrt(dot_r2 - ddy * ddy)
+            span = settle_span(math.ceil(dot_x - h), math.floor(dot_x + h), px,
+                               lambda x: (x - dot_x) ** 2 + (yi - dot_y) ** 2 <= dot_r2)
+            if span:
+                marks.append(span)
+        for m0, m1 in marks:
+            for b0, b1 in body:
+                lo, hi = max(0, m0, b0), min(px - 1, m1, b1)
+                if lo <= hi:
+                    row[3 * lo:3 * hi + 3] = blue * (hi - lo + 1)
+    return buf
 
 
 def main():
@@ -127,6 +156,7 @@ def main():
     data = json.loads(CONTENTS.read_text())
     images = data.get("images", [])
     changed = False
+    tasks = []
     for item in images:
         size = item.get("size")
         scale = item.get("scale")
@@ -142,11 +172,24 @@ def main():
             px = px_from(size, scale)
         out = APPICON_DIR / filename
         out.parent.mkdir(parents=True, exist_ok=True)
-        png = _png_from_raw(px, px, _render_bubble(px))
-        out.write_bytes(png)
+        tasks.append((out, px))
         if item.get("filename") != filename:
             item["filename"] = filename
             changed = True
+    stamps = IconStamps(APPICON_DIR, __file__)
+    tasks = stamps.stale(tasks)
+    if not tasks:
+        if changed:
+            CONTENTS.write_text(json.dumps(data, indent=2))
+        print(f"Icons in {APPICON_DIR} are up to date")
+        return
+    pngs = {}  # px -> encoded icon; several slots share a pixel size
+    for out, px in tasks:
+        if px not in pngs:
+            pngs[px] = _png_from_raw(px, px, _render_bubble(px))
+        out.write_bytes(pngs[px])
+        stamps.record(out, px, pngs[px])
+    stamps.save()
     if changed:
         CONTENTS.write_text(json.dumps(data, indent=2))
     print(f"Generated quiz bubble icons in {APPICON_DIR}")
@@ -8,7 +8,11 @@ filenames AppIcon_quizlist_*.png
 """
 import json
 from pathlib import Path
-import struct, zlib
+import struct, zlib, math
+
+from icon_spans import round_rect_span, settle_span
+from icon_stamps import IconStamps
+from png_up import deflate_up
 
 APPICON_DIR = Path("NotesApp/Assets.xcassets/AppIcon.appiconset")
 CONTENTS = APPICON_DIR / "Contents.json"
@@ -21,14 +25,19 @@ def px_from(size_str: str, scale_str: str) -> int:
 
 
 def _png_chunk(tag: bytes, data: bytes) -> bytes:
-    import zlib as _z
-    return len(data).to_bytes(4, 'big') + tag + data + (_z.crc32(tag + data) & 0xffffffff).to_bytes(4, 'big')
+    return len(data).to_bytes(4, 'big') + tag + data + (zlib.crc32(data, zlib.crc32(tag)) & 0xffffffff).to_bytes(4, 'big')
 
 
-def _png_from_raw(w: int, h: int, raw: bytes) -> bytes:
-    ihdr = struct.pack('>IIBBBBB', w, h, 8, 2, 0, 0, 0)
-    idat = zlib.compress(raw, 9)
-    return b"\x89PNG\r\n\x1a\n" + _png_chunk(b'IHDR', ihdr) + _png_chunk(b'IDAT', idat) + _png_chunk(b'IEND', b'')
+def _png_from_indexed(w: int, h: int, raw: bytes, palette) -> bytes:
+    # Colour type 3: raw holds one palette index per pixel after each row's
+    # filter byte, a third of the RGB bytes, so level 3 is both fast and
+    # about as small as RGB at level 9
+    ihdr = struct.pack('>IIBBBBB', w, h, 8, 3, 0, 0, 0)
+    plte = b"".join(bytes(rgb) for rgb in palette)
+    # Up is smaller than unfiltered at 1024px and at most sizes below
+    idat = deflate_up(raw, 1 + w, 3)
+    return (b"\x89PNG\r\n\x1a\n" + _png_chunk(b'IHDR', ihdr) + _png_chunk(b'PLTE', plte)
+            + _png_chunk(b'IDAT', idat) + _png_chunk(b'IEND', b''))
 
 
 def _bg(y, H):
@@ -42,17 +51,18 @@ def _bg(y, H):
     )
 
 
-def _in_round_rect(x, y, rx, ry, rw, rh, r):
-    # Clamp to inner rect and check distance to corner circle
-    nx = min(max(x, rx + r), rx + rw - r)
-    ny = min(max(y, ry + r), ry + rh - r)
-    dx, dy = x - nx, y - ny
-    return (dx*dx + dy*dy) <= r*r
+def _fill(row, span, ink, clip):
+    """Paint the part of span that lies inside clip; row has a filter byte."""
+    if span and clip:
+        lo, hi = max(span[0], clip[0]), min(span[1], clip[1])
+        if lo <= hi:
+            row[1 + lo:2 + hi] = ink * (hi - lo + 1)
 
 
-def _render_list(px: int) -> bytes:
+def _render_list(px: int):
+    """Return (palette, raw): the icon as palette-indexed scanlines. The
+    gradient plus the card colours stay well under 256 entries."""
     W = H = float(px)
-    raw_rows = []
     # Card rect normalized from 180px prototype
     rx = 0.133 * W
     ry = 0.167 * H
@@ -68,43 +78,66 @@ def _render_list(px: int) -> bytes:
     dot_r_sel = max(4.0, 0.040 * W)
     dot_r = max(3.5, 0.030 * W)
 
-    for yi in range(int(H)):
-        row = bytearray([0])
-        br, bg, bb = _bg(yi, int(H))
-        for xi in range(int(W)):
-            r0, g0, b0 = br, bg, bb
-            in_card = _in_round_rect(xi, yi, rx, ry, rw, rh, rr)
-            if in_card:
-                r0, g0, b0 = 255, 255, 255
-                # Subtle 1px border to enhance separation from background
-                in_outer = _in_round_rect(xi, yi, rx - 1, ry - 1, rw + 2, rh + 2, rr + 1)
-                in_inner = _in_round_rect(xi, yi, rx + 1, ry + 1, rw - 2, rh - 2, rr - 1)
-                if in_outer and not in_inner:
-                    r0, g0, b0 = 220, 226, 240
-                for i in range(4):
-                    cy = start + i * gap
-                    selected = (i == 1)
-                    # radio dot
-                    dx = xi - (rx + 0.089 * W)
-                    dy = yi - cy
-                    rdot = dot_r_sel if selected else dot_r
-                    if dx*dx + dy*dy <= rdot*rdot:
-                        if selected:
-                            r0, g0, b0 = 52, 199, 89
-                        else:
-                            r0, g0, b0 = 190, 196, 210
-                    # answer pill line
-                    lx0 = rx + 0.167 * W
-                    lx1 = rx + rw - 0.067 * W
-                    if abs(yi - cy) <= pill_half and lx0 <= xi <= lx1:
-                        if selected:
-                            # darker gray for contrast
-                            r0, g0, b0 = 190, 196, 210
-                        else:
-                            r0, g0, b0 = 210, 215, 228
-            row += bytes((int(r0), int(g0), int(b0)))
-        raw_rows.append(bytes(row))
-    return b"".join(raw_rows)
+    palette = []
+    inks = {}
+
+    def ink(rgb):
+        """One-byte pixel for rgb, adding it to the palette on first use."""
+        if rgb not in inks:
+            inks[rgb] = bytes((len(palette),))
+            palette.append(rgb)
+        return inks[rgb]
+
+    # Geometry and colours that do not change from row to row; option 1 is
+    # selected (green dot, darker gray pill for contrast)
+    white = ink((255, 255, 255))
+    border = ink((220, 226, 240))
+    dot_cx = rx + 0.089 * W
+    pill = (math.ceil(rx + 0.167 * W), math.floor(rx + rw - 0.067 * W))
+    options = [
+        (start + i * gap,
+         dot_r_sel if i == 1 else dot_r,
+         ink((52, 199, 89) if i == 1 else (190, 196, 210)),
+         ink((190, 196, 210) if i == 1 else (210, 215, 228)))
+        for i in range(4)
+    ]
+
+    # Every shape is a rounded rect, a disc or a bar, so a row is the
+    # gradient plus a few runs painted by slice assignment, in the same
+    # order the per-pixel tests used to apply them. Rows go straight into
+    # one preallocated buffer whose filter bytes stay 0.
+    stride = 1 + px
+    buf = bytearray(px * stride)
+    view = memoryview(buf)
+    bg_rows = [ink(_bg(yi, px)) for yi in range(px)]
+    for yi in range(px):
+        row = view[yi * stride:(yi + 1) * stride]
+        row[1:] = bg_rows[yi] * px
+        card = round_rect_span(yi, rx, ry, rw, rh, rr, px)
+        if not card:
+            continue
+        _fill(row, card, white, card)
+        # Subtle 1px border to enhance separation from background
+        outer = round_rect_span(yi, rx - 1, ry - 1, rw + 2, rh + 2, rr + 1, px)
+        inner = round_rect_span(yi, rx + 1, ry + 1, rw - 2, rh - 2, rr - 1, px)
+        if outer:
+            if inner:
+                _fill(row, (outer[0], inner[0] - 1), border, card)
+                _fill(row, (inner[1] + 1, outer[1]), border, card)
+            else:
+                _fill(row, outer, border, card)
+        for cy, rdot, dot_ink, pill_ink in options:
+            # radio dot
+            dy = yi - cy
+            if dy*dy <= rdot*rdot:
+                h = math.sqrt(rdot*rdot - dy*dy)
+                dot = settle_span(math.ceil(dot_cx - h), math.floor(dot_cx + h), px,
+                                  lambda x: (x - dot_cx)*(x - dot_cx) + dy*dy <= rdot*rdot)
+                _fill(row, dot, dot_ink, card)
+            # answer pill line
+            if abs(dy) <= pill_half:
+                _fill(row, pill, pill_ink, card)
+    return palette, buf
 
 
 def main():
@@ -113,6 +146,7 @@ def main():
     data = json.loads(CONTENTS.read_text())
     images = data.get('images', [])
     changed = False
+    tasks = []
     for item in images:
         size = item.get('size')
         scale = item.get('scale')
@@ -128,11 +162,25 @@ def main():
             px = px_from(size, scale)
         out = APPICON_DIR / filename
         out.parent.mkdir(parents=True, exist_ok=True)
-        png = _png_from_raw(px, px, _render_list(px))
-        out.write_bytes(png)
+        tasks.append((out, px))
         if item.get('filename') != filename:
             item['filename'] = filename
             changed = True
+    stamps = IconStamps(APPICON_DIR, __file__)
+    tasks = stamps.stale(tasks)
+    if not tasks:
+        if changed:
+            CONTENTS.write_text(json.dumps(data, indent=2))
+        print(f"Icons in {APPICON_DIR} are up to date")
+        return
+    pngs = {}  # px -> encoded icon; several slots share a pixel size
+    for out, px in tasks:
+        if px not in pngs:
+            palette, raw = _render_list(px)
+            pngs[px] = _png_from_indexed(px, px, raw, palette)
+        out.write_bytes(pngs[px])
+        stamps.record(out, px, pngs[px])
+    stamps.save()
     if changed:
         CONTENTS.write_text(json.dumps(data, indent=2))
     print(f"Generated quiz list icons in {APPICON_DIR}")
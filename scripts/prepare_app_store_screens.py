@@ -12,8 +12,10 @@ Outputs:
 
 Requires Pillow.
 """
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from PIL import Image
+import math
 import sys
 
 ROOT = Path(__file__).resolve().parents[1]
@@ -41,9 +43,15 @@ def crop_to_aspect(img: Image.Image, w: int, h: int) -> Image.Image:
         return img.crop((0, y0, tw, y0 + new_h))
 
 def process_image(path: Path):
-    img = Image.open(path).convert('RGB')
+    img = Image.open(path)
     w, h = img.size
     portrait = h >= w
+    # Let JPEG sources decode at 1/2, 1/4 or 1/8 scale (libjpeg DCT scaling)
+    # when even the largest target crop keeps at least its output size; each
+    # crop needs scale >= max(W / w, H / h). No-op for PNGs.
+    scale = max(max(W / w, H / h) if portrait else max(H / w, W / h) for W, H in TARGETS)
+    img.draft('RGB', (math.ceil(w * scale), math.ceil(h * scale)))
+    img = img.convert('RGB')
     for W, H in TARGETS:
         if not portrait:
             W, H = H, W  # landscape rotated
@@ -56,6 +64,14 @@ def process_image(path: Path):
         resized.save(out, format='JPEG', quality=95, optimize=True)
         print(f"Wrote {out}")
 
+def try_process_image(path: Path) -> bool:
+    try:
+        process_image(path)
+        return True
+    except Exception as e:
+        print(f"Failed {path}: {e}", file=sys.stderr)
+        return False
+
 def main(argv):
     inputs = []
     if len(argv) > 1:
@@ -72,12 +88,10 @@ def main(argv):
     if not inputs:
         print('No input screenshots found.', file=sys.stderr)
         sys.exit(1)
-    for p in inputs:
-        try:
-            process_image(p)
-        except Exception as e:
-            print(f"Failed {p}: {e}", file=sys.stderr)
-            continue
+    # Each screenshot is decoded, cropped and LANCZOS-resized independently;
+    # use processes so they run on all cores
+    with ProcessPoolExecutor() as ex:
+        list(ex.map(try_process_image, inputs))
 
 if __name__ == '__main__':
     main(sys.argv)
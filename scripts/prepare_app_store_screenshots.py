@@ -17,7 +17,13 @@ Usage:
       --out65 attachments/export-6p5 \
       --outi13a attachments/export-ipad13a \
       --outi13b attachments/export-ipad13b \
-      --bg #FFFFFF
+      --bg #FFFFFF \
+      --format jpeg
+
+Outputs are JPEG (quality 95) by default, like prepare_app_store_screens.py;
+pass --format png for lossless PNGs. An input whose extension doesn't match
+the output format gets the format's one (shot.png -> shot.jpg); two inputs
+that would map to the same output name (shot.png and shot.jpg) are refused.
 
 Requires:
   pip install Pillow
@@ -25,6 +31,8 @@ Requires:
 
 import argparse
 import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from pathlib import Path
 from typing import Tuple
 
@@ -52,6 +60,7 @@ def parse_args() -> argparse.Namespace:
     p.add_argument("--outi13a", default=os.path.join("attachments", "export-ipad13a"), help="Output folder for iPad 13\" (2064x2752)")
     p.add_argument("--outi13b", default=os.path.join("attachments", "export-ipad13b"), help="Output folder for iPad 13\" (2048x2732)")
     p.add_argument("--bg", default="#FFFFFF", help="Background hex color for padding, e.g. #FFFFFF")
+    p.add_argument("--format", choices=("jpeg", "png"), default="jpeg", help="Output format (default: jpeg)")
     return p.parse_args()
 
 
@@ -60,6 +69,9 @@ def ensure_dir(path: Path) -> None:
 
 
 def scale_and_pad(img: Image.Image, target: Tuple[int, int], bg_color: Tuple[int, int, int]) -> Image.Image:
+    if img.size == target:
+        # Already the device size: pass it through without resampling
+        return img
     tw, th = target
     iw, ih = img.size
     scale = min(tw / iw, th / ih)
@@ -72,6 +84,45 @@ def scale_and_pad(img: Image.Image, target: Tuple[int, int], bg_color: Tuple[int
     return canvas
 
 
+def output_name(p: Path, fmt: str) -> str:
+    exts = (".jpg", ".jpeg") if fmt == "jpeg" else (".png",)
+    return p.name if p.suffix.lower() in exts else p.with_suffix(exts[0]).name
+
+
+def save(img: Image.Image, path: Path, fmt: str) -> None:
+    # JPEG encodes these multi-megapixel canvases several times faster than
+    # PNG's deflate; App Store Connect re-encodes uploads either way
+    if fmt == "jpeg":
+        img.save(path, format="JPEG", quality=95, optimize=True)
+    else:
+        img.save(path, format="PNG", compress_level=3)
+
+
+def process_image(p: Path, outs: Tuple[Path, Path, Path, Path], bg: Tuple[int, int, int], fmt: str) -> bool:
+    """Write the four device-sized variants of one screenshot into outs
+    (6.7", 6.5", iPad 13" A, iPad 13" B); False if it had to be skipped."""
+    out67, out65, outi13a, outi13b = outs
+    print(f"Processing {p.name}...")
+    name = output_name(p, fmt)
+    try:
+        with Image.open(p) as im:
+            # Convert to RGB to avoid mode issues
+            im = im.convert("RGB")
+            out_img_67 = scale_and_pad(im, SIZE_67, bg)
+            out_img_65 = scale_and_pad(im, SIZE_65, bg)
+            save(out_img_67, out67 / name, fmt)
+            save(out_img_65, out65 / name, fmt)
+            # iPad 13-inch variants
+            out_img_i13a = scale_and_pad(im, SIZE_IPAD13_A, bg)
+            out_img_i13b = scale_and_pad(im, SIZE_IPAD13_B, bg)
+            save(out_img_i13a, outi13a / name, fmt)
+            save(out_img_i13b, outi13b / name, fmt)
+        return True
+    except Exception as e:  # pragma: no cover
+        print(f"  ! Skipping {p.name}: {e}")
+        return False
+
+
 def main() -> None:
     args = parse_args()
     src = Path(args.source)
@@ -105,31 +156,24 @@ def main() -> None:
     print(f" Output iPad13 A: {outi13a} ({SIZE_IPAD13_A[0]}x{SIZE_IPAD13_A[1]})")
     print(f" Output iPad13 B: {outi13b} ({SIZE_IPAD13_B[0]}x{SIZE_IPAD13_B[1]})")
     print(f" Background: {args.bg}")
+    print(f" Format:     {args.format}")
 
     images = [p for p in src.iterdir() if p.is_file() and p.suffix.lower() in VALID_EXT]
     if not images:
         print("No images found (png/jpg/jpeg).")
         return
-
-    processed = 0
+    names = {}
     for p in images:
-        print(f"Processing {p.name}...")
-        try:
-            with Image.open(p) as im:
-                # Convert to RGB to avoid mode issues
-                im = im.convert("RGB")
-                out_img_67 = scale_and_pad(im, SIZE_67, bg)
-                out_img_65 = scale_and_pad(im, SIZE_65, bg)
-                out_img_67.save(out67 / p.name, format="PNG")
-                out_img_65.save(out65 / p.name, format="PNG")
-                # iPad 13-inch variants
-                out_img_i13a = scale_and_pad(im, SIZE_IPAD13_A, bg)
-                out_img_i13b = scale_and_pad(im, SIZE_IPAD13_B, bg)
-                out_img_i13a.save(outi13a / p.name, format="PNG")
-                out_img_i13b.save(outi13b / p.name, format="PNG")
-            processed += 1
-        except Exception as e:  # pragma: no cover
-            print(f"  ! Skipping {p.name}: {e}")
+        names.setdefault(output_name(p, args.format).lower(), []).append(p.name)
+    clashes = [" and ".join(sorted(ps)) for ps in names.values() if len(ps) > 1]
+    if clashes:
+        raise SystemExit(f"Inputs would overwrite each other's {args.format} output: {'; '.join(clashes)}")
+
+    # Screenshots are independent and Lanczos resizing plus encoding is CPU
+    # bound; give each core its own image
+    outs = (out67, out65, outi13a, outi13b)
+    with ProcessPoolExecutor() as ex:
+        processed = sum(ex.map(process_image, images, repeat(outs), repeat(bg), repeat(args.format)))
 
     print(f"Done. Processed {processed} image(s).")
     print(" Outputs:")
@@ -6,17 +6,18 @@ the Python stdlib. Geometry is proportionally scaled from a 1024 base.
 Usage: python3 scripts/render_icon_goal_size.py 180 branding/preview.png
 """
 from pathlib import Path
-import struct, zlib, sys
+import struct, zlib, sys, math
+
+from icon_spans import dist2_to_seg, edge_functions, settle_span, tri_span
 
 def png_from_raw(w: int, h: int, raw: bytes) -> bytes:
     def chunk(tag: bytes, data: bytes) -> bytes:
-        import zlib as _z
-        return (len(data)).to_bytes(4, 'big') + tag + data + (_z.crc32(tag + data) & 0xffffffff).to_bytes(4, 'big')
+        return (len(data)).to_bytes(4, 'big') + tag + data + (zlib.crc32(data, zlib.crc32(tag)) & 0xffffffff).to_bytes(4, 'big')
     ihdr = struct.pack('>IIBBBBB', w, h, 8, 2, 0, 0, 0)
     idat = zlib.compress(raw, 9)
     return b"\x89PNG\r\n\x1a\n" + chunk(b'IHDR', ihdr) + chunk(b'IDAT', idat) + chunk(b'IEND', b'')
 
-def render(px: int) -> bytes:
+def render(px: int) -> bytearray:
     W = H = px
     def lerp(a, b, t):
         return int(a + (b - a) * t)
@@ -41,19 +42,6 @@ def render(px: int) -> bytes:
         u = (dot11 * dot02 - dot01 * dot12) * inv
         v = (dot00 * dot12 - dot01 * dot02) * inv
         return (u >= 0) and (v >= 0) and (u + v <= 1)
-    import math
-    def dist_to_seg(x, y, x1, y1, x2, y2):
-        vx, vy = x2 - x1, y2 - y1
-        wx, wy = x - x1, y - y1
-        c1 = vx*wx + vy*wy
-        if c1 <= 0:
-            return math.hypot(x - x1, y - y1)
-        c2 = vx*vx + vy*vy
-        if c2 <= c1:
-            return math.hypot(x - x2, y - y2)
-        b = c1 / c2
-        bx, by = x1 + b*vx, y1 + b*vy
-        return math.hypot(x - bx, y - by)
 
     # Proportional geometry based on 1024 reference
     cx = W/2.0
@@ -63,6 +51,8 @@ def render(px: int) -> bytes:
     bx, by = cx + 0.70*r, cy_top + 0.35*r
     tx, ty = cx, 0.801 * H
     r2 = r*r
+    edges = edge_functions(ax, ay, bx, by, tx, ty)
+    tri_y0, tri_y1 = max(0, math.ceil(min(ay, by, ty))), min(int(H) - 1, math.floor(max(ay, by, ty)))
 
     # Check mark segments (normalized from 1024)
     a1 = (0.381*W, 0.576*H)
@@ -70,32 +60,67 @@ def render(px: int) -> bytes:
     b1 = a2
     b2 = (0.635*W, 0.459*H)
     thick = 0.0176 * W
+    thick2 = thick*thick
+    # Rows and columns beyond thick of every check vertex can't be painted
+    check_x0 = math.floor(min(a1[0], a2[0], b2[0]) - thick)
+    check_x1 = math.ceil(max(a1[0], a2[0], b2[0]) + thick)
+    check_y0 = math.floor(min(a1[1], a2[1], b2[1]) - thick)
+    check_y1 = math.ceil(max(a1[1], a2[1], b2[1]) + thick)
+
+    # Only cap pixels within rim_band (squared distance) of the edge can
+    # get a non-zero shade
+    rim_band = min(0.0215*W*W, 40 * 0.000078*W*W)
+    cap_dy = 0.35*r
+    rim_d = 0.0215*W*W
+    shade_step = 0.000078*W*W
+    white = bytes((255, 255, 255))
+    green = bytes((52, 199, 89))
+    greys = [bytes((255 - shade,) * 3) for shade in range(41)]  # by rim shade
 
-    rows = []
+    # Cap and tail are convex, so each row of the drop is at most two runs;
+    # only the rim shading and the check mark are still tested per pixel,
+    # and only inside the drop. Filter bytes stay 0.
+    bg_rows = [bytes(bg_color(y)) for y in range(int(H))]
+    stride = 1 + 3 * int(W)
+    raw = bytearray(int(H) * stride)
+    view = memoryview(raw)
     for y in range(int(H)):
-        row = bytearray([0])
-        br, bg, bb = bg_color(y)
-        for x in range(int(W)):
-            r0, g0, b0 = br, bg, bb
-            dx = x - cx
-            dy = y - cy_top
-            in_cap = (dy <= 0.35*r) and (dx*dx + dy*dy <= r2)
-            in_tail = inside_triangle(x, y, ax, ay, bx, by, tx, ty)
-            in_drop = in_cap or in_tail
-            if in_drop:
-                r0, g0, b0 = 255, 255, 255
-                if in_cap:
+        row = view[y * stride:(y + 1) * stride]
+        row[1:] = bg_rows[y] * int(W)
+        dy = y - cy_top
+        cap = None
+        if dy <= cap_dy and dy*dy <= r2:
+            h = math.sqrt(r2 - dy*dy)
+            cap = settle_span(math.ceil(cx - h), math.floor(cx + h), int(W),
+                              lambda x: (x - cx)*(x - cx) + dy*dy <= r2)
+        tail = None
+        if tri_y0 <= y <= tri_y1:
+            tail = tri_span(edges, y, int(W), lambda x: inside_triangle(x, y, ax, ay, bx, by, tx, ty))
+        drop = [span for span in (cap, tail) if span]
+        for lo, hi in drop:
+            row[1 + 3*lo:4 + 3*hi] = white * (hi - lo + 1)
+        if cap:
+            k = r2 - rim_band - dy*dy - 1
+            if k > 0:
+                inner = math.sqrt(k)
+                rim = (range(cap[0], min(cap[1] + 1, math.floor(cx - inner) + 2)),
+                       range(max(cap[0], math.ceil(cx + inner) - 1), cap[1] + 1))
+            else:
+                rim = (range(cap[0], cap[1] + 1),)
+            for xs in rim:
+                for x in xs:
+                    dx = x - cx
                     d = abs((dx*dx + dy*dy) - r2)
-                    if d < (0.0215*W*W):
-                        shade = max(0, int(40 - d/(0.000078*W*W)))
-                        r0 = max(0, r0 - shade)
-                        g0 = max(0, g0 - shade)
-                        b0 = max(0, b0 - shade)
-                if (dist_to_seg(x, y, *a1, *a2) < thick) or (dist_to_seg(x, y, *b1, *b2) < thick):
-                    r0, g0, b0 = 52, 199, 89
-            row += bytes((int(r0), int(g0), int(b0)))
-        rows.append(bytes(row))
-    return b"".join(rows)
+                    if d < rim_d:
+                        shade = max(0, int(40 - d/shade_step))
+                        row[1 + 3*x:4 + 3*x] = greys[shade]
+        if not check_y0 <= y <= check_y1:
+            continue
+        for lo, hi in drop:
+            for x in range(max(lo, check_x0), min(hi, check_x1) + 1):
+                if (dist2_to_seg(x, y, *a1, *a2) < thick2) or (dist2_to_seg(x, y, *b1, *b2) < thick2):
+                    row[1 + 3*x:4 + 3*x] = green
+    return raw
 
 def main():
     if len(sys.argv) < 3:
@@ -13,13 +13,15 @@ Outputs:
 from pathlib import Path
 import struct, zlib, math
 
+from icon_spans import edge_functions, settle_span, tri_span
+
 PX = 180
 OUT_DIR = Path("branding")
 
 
 def png_from_raw(w: int, h: int, raw: bytes) -> bytes:
     def chunk(tag: bytes, data: bytes) -> bytes:
-        return len(data).to_bytes(4, "big") + tag + data + (zlib.crc32(tag + data) & 0xFFFFFFFF).to_bytes(4, "big")
+        return len(data).to_bytes(4, "big") + tag + data + (zlib.crc32(data, zlib.crc32(tag)) & 0xFFFFFFFF).to_bytes(4, "big")
     ihdr = struct.pack('>IIBBBBB', w, h, 8, 2, 0, 0, 0)
     idat = zlib.compress(raw, 9)
     return b"\x89PNG\r\n\x1a\n" + chunk(b'IHDR', ihdr) + chunk(b'IDAT', idat) + chunk(b'IEND', b'')
@@ -54,7 +56,38 @@ def inside_triangle(px, py, ax, ay, bx, by, cx, cy):
     return (u >= 0) and (v >= 0) and (u + v <= 1)
 
 
-def render_variant(kind: str, px: int = PX) -> bytes:
+def ring_spans(y, cx, cy, rad, w):
+    """Runs of row y within 1px of the circle of radius rad (|dist - rad| < 1)."""
+    dy = y - cy
+    out2 = (rad + 1.0) ** 2 - dy*dy
+    if out2 < 0:
+        return []
+    ho = math.sqrt(out2)
+    in2 = (rad - 1.0) ** 2 - dy*dy
+    hi = math.sqrt(in2) if in2 > 0 else 0.0
+
+    # |dist - rad| < 1 without the sqrt: compare squared distances
+    r_in2 = (rad - 1.0) ** 2 if rad > 1.0 else -1.0
+
+    def inside(x):
+        dx = x - cx
+        return r_in2 < dx*dx + dy*dy < (rad + 1.0) ** 2
+
+    left = settle_span(math.ceil(cx - ho), math.floor(cx - hi), w, inside)
+    right = settle_span(math.ceil(cx + hi), math.floor(cx + ho), w, inside)
+    if left and right and left[1] + 1 >= right[0]:
+        # Near the top and bottom of the ring the two runs meet
+        return [(min(left[0], right[0]), max(left[1], right[1]))]
+    return [s for s in (left, right) if s]
+
+
+def fill(row, span, rgb):
+    """Paint span (inclusive) into row, which starts with its filter byte."""
+    lo, hi = span
+    row[1 + 3*lo:4 + 3*hi] = bytes(rgb) * (hi - lo + 1)
+
+
+def render_variant(kind: str, px: int = PX) -> bytearray:
     W = H = px
     cx = W / 2.0
     cy_top = 0.415 * H
@@ -63,55 +96,73 @@ def render_variant(kind: str, px: int = PX) -> bytes:
     bx, by = cx + 0.70 * r, cy_top + 0.35 * r
     tx, ty = cx, 0.80 * H
     r2 = r * r
-
-    rows = []
+    edges = edge_functions(ax, ay, bx, by, tx, ty)
+    tri_y0, tri_y1 = max(0, math.ceil(min(ay, by, ty))), min(int(H) - 1, math.floor(max(ay, by, ty)))
+    rim_band = min(0.01 * W * W, 30 * 0.00007 * W * W)
+    cap_dy = 0.35 * r
+    rim_d = 0.01 * W * W
+    shade_step = 0.00007 * W * W
+    ring_cy = cy_top + 0.21*r
+    target_rings = ((0.60*r, 0.08), (0.85*r, 0.05))
+    ring_r = 1.1 * r
+    greys = [bytes((255 - shade,) * 3) for shade in range(31)]  # by rim shade
+
+    # The drop and both ring styles are convex shapes or thin rings, so each
+    # row is the gradient plus a few runs painted by slice assignment; only
+    # the cap's rim shading is still computed per pixel. Filter bytes stay 0.
+    bg_rows = [bytes(grad_bg(y, H)) for y in range(int(H))]
+    stride = 1 + 3 * int(W)
+    raw = bytearray(int(H) * stride)
+    view = memoryview(raw)
     for y in range(int(H)):
-        row = bytearray([0])
-        br, bg, bb = grad_bg(y, H)
-        for x in range(int(W)):
-            r0, g0, b0 = br, bg, bb
-
-            # Optional subtle target rings for 'target' kind
-            if kind == 'target':
-                dx0 = x - cx
-                dy0 = y - (cy_top + 0.21*r)
-                d = (dx0*dx0 + dy0*dy0) ** 0.5
-                for rr, strength in ((0.60*r, 0.08), (0.85*r, 0.05)):
-                    if abs(d - rr) < 1.0:
-                        r0 = min(255, int(r0*(1.0+strength) + 18*strength))
-                        g0 = min(255, int(g0*(1.0+strength) + 18*strength))
-                        b0 = min(255, int(b0*(1.0+strength) + 18*strength))
-
-            # Drop shape
-            dx = x - cx
-            dy = y - cy_top
-            in_cap = (dy <= 0.35*r) and (dx*dx + dy*dy <= r2)
-            in_tail = inside_triangle(x, y, ax, ay, bx, by, tx, ty)
-            in_drop = in_cap or in_tail
-            if in_drop:
-                r0, g0, b0 = 255, 255, 255
-                # soft inner edge
-                if in_cap:
+        row = view[y * stride:(y + 1) * stride]
+        row[1:] = bg_rows[y] * int(W)
+
+        # Optional subtle target rings for 'target' kind
+        if kind == 'target':
+            for rr, strength in target_rings:
+                # Tint what is already there: at tiny sizes the rings overlap
+                for lo, hi in ring_spans(y, cx, ring_cy, rr, int(W)):
+                    for i in range(1 + 3*lo, 4 + 3*hi):
+                        row[i] = min(255, int(row[i]*(1.0+strength) + 18*strength))
+
+        # Drop shape
+        dy = y - cy_top
+        cap = None
+        if dy <= cap_dy and dy*dy <= r2:
+            h = math.sqrt(r2 - dy*dy)
+            cap = settle_span(math.ceil(cx - h), math.floor(cx + h), int(W),
+                              lambda x: (x - cx)*(x - cx) + dy*dy <= r2)
+        tail = None
+        if tri_y0 <= y <= tri_y1:
+            tail = tri_span(edges, y, int(W), lambda x: inside_triangle(x, y, ax, ay, bx, by, tx, ty))
+        for span in (cap, tail):
+            if span:
+                fill(row, span, (255, 255, 255))
+        if cap:
+            # soft inner edge; pixels well inside the rim stay white
+            k = r2 - rim_band - dy*dy - 1
+            if k > 0:
+                inner = math.sqrt(k)
+                rim = (range(cap[0], min(cap[1] + 1, math.floor(cx - inner) + 2)),
+                       range(max(cap[0], math.ceil(cx + inner) - 1), cap[1] + 1))
+            else:
+                rim = (range(cap[0], cap[1] + 1),)
+            for xs in rim:
+                for x in xs:
+                    dx = x - cx
                     d2 = abs((dx*dx + dy*dy) - r2)
-                    if d2 < (0.01 * W * W):
-                        shade = max(0, int(30 - d2 / (0.00007 * W * W)))
-                        r0 = max(0, r0 - shade)
-                        g0 = max(0, g0 - shade)
-                        b0 = max(0, b0 - shade)
-
-            # Optional ring around drop for 'ring' kind
-            if kind == 'ring':
-                dxr = x - cx
-                dyr = y - (cy_top + 0.21*r)
-                rr = (dxr*dxr + dyr*dyr) ** 0.5
-                ring_r = 1.1 * r
-                if abs(rr - ring_r) < 1.0:
-                    # white ring
-                    r0, g0, b0 = 255, 255, 255
-
-            row += bytes((int(r0), int(g0), int(b0)))
-        rows.append(bytes(row))
-    return b"".join(rows)
+                    if d2 < rim_d:
+                        shade = max(0, int(30 - d2 / shade_step))
+                        row[1 + 3*x:4 + 3*x] = greys[shade]
+
+        # Optional ring around drop for 'ring' kind
+        if kind == 'ring':
+            for span in ring_spans(y, cx, ring_cy, ring_r, int(W)):
+                # white ring
+                fill(row, span, (255, 255, 255))
+
+    return raw
 
 
 def write_png(kind: str, path: Path):
@@ -3,8 +3,63 @@ import time
 import sys
 import traceback
 import json
+import threading
+import requests
 from appium import webdriver
-from selenium.common.exceptions import WebDriverException, NoSuchElementException
+from appium.webdriver.applicationstate import ApplicationState
+from appium.webdriver.common.appiumby import AppiumBy
+from selenium.common.exceptions import NoSuchElementException
+
+
+# Fallback Run lookup: a button, or a bare label, mentioning 'Run', in a
+# single WDA search
+RUN_PREDICATE = (
+    "(type == 'XCUIElementTypeButton' OR type == 'XCUIElementTypeStaticText')"
+    " AND (name CONTAINS 'Run' OR label CONTAINS 'Run')"
+)
+
+
+def wait_for_element(driver, by, value, attempts=10, interval=0.5):
+    """find_element, retried while the app is still launching; re-raises
+    NoSuchElementException after the last attempt."""
+    for attempt in range(attempts):
+        try:
+            return driver.find_element(by, value)
+        except NoSuchElementException:
+            if attempt == attempts - 1:
+                raise
+            time.sleep(interval)
+
+
+def write_session_file(url):
+    # Picked up by the workflow's "Publish session link" step
+    with open("bs_session.txt", "w") as f:
+        f.write(url)
+
+
+def watch_for_crash(driver, bundle_id, crashes, window=20.0):
+    """Probe the app's state for `window` seconds, appending a message to
+    `crashes` and returning at the first sign of a crash.
+
+    queryAppState answers with one small int, where page_source had WDA
+    snapshot and serialize the whole UI tree on every probe. Crashes after
+    the tap tend to be quick, so probe often at first and back off; the last
+    probe still lands at the end of the window.
+    """
+    deadline = time.monotonic() + window
+    for delay in (0.2, 0.4, 0.8, 1.6, 3.2, 6.0, 8.0):
+        time.sleep(max(0.0, min(delay, deadline - time.monotonic())))
+        try:
+            state = driver.query_app_state(bundle_id)  # raises if session died
+        except Exception as e:
+            # Not just WebDriverException: urllib3 transport errors come
+            # through unwrapped, and an uncaught one would end this thread
+            # silently and let the run pass
+            crashes.append(f"Session appears to have crashed (driver/queryAppState failed: {e!r})")
+            return
+        if state != ApplicationState.RUNNING_IN_FOREGROUND:
+            crashes.append(f"App left the foreground (state {state}); treating as a crash")
+            return
 
 
 def main():
@@ -13,9 +68,17 @@ def main():
     app_url = os.environ.get("APP_URL")
     device = os.environ.get("DEVICE_NAME", "iPhone 15")
     os_version = os.environ.get("OS_VERSION", "17")
+    # The app under test, for cheap state probes once Run is tapped
+    bundle_id = os.environ.get("BUNDLE_ID")
+    # Device/network/Appium logs and visual debug screenshots cost time on
+    # every command; only collect them when asked to
+    debug = bool(os.environ.get("BS_DEBUG"))
     if not (user and key and app_url):
         print("Missing BROWSERSTACK credentials or APP_URL", file=sys.stderr)
         sys.exit(1)
+    if not bundle_id:
+        print("Missing BUNDLE_ID", file=sys.stderr)
+        sys.exit(1)
 
     # Use W3C capabilities with BrowserStack bstack:options
     caps = {
@@ -24,16 +87,24 @@ def main():
         "appium:app": app_url,
         "appium:autoAcceptAlerts": True,
         "appium:newCommandTimeout": 120,
+        # WDA start-up: reuse the runner and test manager, don't wait for the
+        # UI to go idle before each command (the Run lookup polls anyway)
+        "appium:waitForQuiescence": False,
+        "appium:shouldUseSingletonTestManager": True,
+        "appium:useNewWDA": False,
+        "appium:wdaLaunchTimeout": 60000,
+        "appium:wdaStartupRetries": 1,
+        "appium:skipLogCapture": not debug,
         "bstack:options": {
             "deviceName": device,
             "osVersion": os_version,
             "projectName": "CodeSnake",
             "buildName": f"BS Smoke {int(time.time())}",
             "sessionName": "Launch + Run button tap",
-            "debug": True,
-            "deviceLogs": True,
-            "networkLogs": True,
-            "appiumLogs": True,
+            "debug": debug,
+            "deviceLogs": debug,
+            "networkLogs": debug,
+            "appiumLogs": debug,
         },
     }
 
@@ -41,59 +112,69 @@ def main():
     driver = None
     crashed = False
     session_url = None
+    writer = None
     try:
         driver = webdriver.Remote(remote, caps)
-        # Fetch public session URL via executor API for reliability
-        try:
-            details = driver.execute_script('browserstack_executor: {"action": "getSessionDetails"}')
-            if isinstance(details, dict) and details.get("public_url"):
-                session_url = details["public_url"]
-        except Exception:
-            pass
-        if not session_url:
-            session_id = driver.session_id
-            session_url = f"https://app-automate.browserstack.com/dashboard/v2/sessions/{session_id}"
-        with open("bs_session.txt", "w") as f:
-            f.write(session_url)
+        # The dashboard URL follows from the session id; the public URL costs
+        # a round trip, so it is fetched at teardown instead
+        session_url = f"https://app-automate.browserstack.com/dashboard/v2/sessions/{driver.session_id}"
+        # Keep the file write off the path to the Run tap; the print gives
+        # the link right away
+        writer = threading.Thread(target=write_session_file, args=(session_url,))
+        writer.start()
         print(f"BrowserStack session: {session_url}")
 
-        # Wait for app to settle
-        time.sleep(5)
-
-        # Try to find and tap a button labeled "Run"
+        # Try to find and tap a button labeled "Run"; polling for it replaces
+        # a fixed wait for the app to settle
         tapped = False
         try:
-            run_btn = driver.find_element("-ios predicate string", "type == 'XCUIElementTypeButton' AND (name CONTAINS 'Run' OR label CONTAINS 'Run')")
-            run_btn.click()
-            tapped = True
-            print("Tapped Run button by label")
+            # The toolbar button's accessibility id is its "Run" label; that is
+            # a direct native lookup rather than a predicate scan of the tree
+            run_btn = wait_for_element(driver, AppiumBy.ACCESSIBILITY_ID, "Run")
         except NoSuchElementException:
-            # Fallback: try any visible 'Run' static text then its parent
             try:
-                static = driver.find_element("-ios predicate string", "type == 'XCUIElementTypeStaticText' AND (name CONTAINS 'Run' OR label CONTAINS 'Run')")
-                static.click()
-                tapped = True
-                print("Tapped Run static text fallback")
-            except Exception:
-                print("Run control not found; continuing to observe for crashes")
+                run_btn = driver.find_element(AppiumBy.IOS_PREDICATE, RUN_PREDICATE)
+            except NoSuchElementException:
+                run_btn = None
 
-        # Observe for crash for up to 20 seconds
-        for i in range(20):
-            try:
-                _ = driver.page_source  # will raise if session died
-            except WebDriverException:
-                crashed = True
-                print("Session appears to have crashed (driver/page_source failed)")
-                break
-            time.sleep(1)
+        # Observe for crash for up to 20 seconds, starting as the tap is sent
+        # so the first probes overlap WDA dispatching it
+        crashes = []
+        watcher = threading.Thread(target=watch_for_crash, args=(driver, bundle_id, crashes), daemon=True)
+        watcher.start()
+        if run_btn is not None:
+            run_btn.click()
+            tapped = True
+            print("Tapped Run button by label")
+        else:
+            print("Run control not found; continuing to observe for crashes")
+        watcher.join()
+        if crashes:
+            crashed = True
+            print(crashes[0])
 
         # Mark session status for BrowserStack dashboard
         status = "passed" if not crashed else "failed"
         reason = "No crash detected" if not crashed else "App crashed during smoke test"
-        try:
-            driver.execute_script('browserstack_executor: {"action": "setSessionStatus", "arguments": {"status":"%s", "reason": "%s"}}' % (status, reason))
-        except Exception:
-            pass
+        if crashed:
+            # The session may be gone, and an in-session call would then hang
+            # until the hub times it out; the REST API answers either way
+            try:
+                requests.put(
+                    f"https://api-cloud.browserstack.com/app-automate/sessions/{driver.session_id}.json",
+                    auth=(user, key),
+                    json={"status": status, "reason": reason},
+                    timeout=5,
+                )
+            except requests.RequestException:
+                pass
+        else:
+            try:
+                driver.execute_script('browserstack_executor: {"action": "setSessionStatus", "arguments": {"status":"%s", "reason": "%s"}}' % (status, reason))
+            except Exception:
+                # Only bookkeeping: a transport error here must not turn a
+                # passing run into a failure
+                pass
 
         if crashed:
             sys.exit(1)
@@ -102,6 +183,18 @@ def main():
         traceback.print_exc()
         sys.exit(1)
     finally:
+        if writer is not None:
+            writer.join()
+        if driver is not None and not crashed:
+            # Swap in the shareable public URL for the session link, if any
+            try:
+                details = driver.execute_script('browserstack_executor: {"action": "getSessionDetails"}')
+                if isinstance(details, dict) and details.get("public_url"):
+                    write_session_file(details["public_url"])
+            except Exception:
+                # Anything escaping here would skip quit() below and leak
+                # the session
+                pass
         try:
             if driver is not None:
                 driver.quit()